@@ -3,7 +3,17 @@ import numpy as np
 import os
 from pathlib import Path
 from datetime import datetime
-import shelve
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+import pickle
+import hashlib
+import zipfile
+
+# Number of Model objects makeModel keeps for reuse
+MAX_MODELS = 8
+# The parsed data files are kept here instead of next to the raw data
+CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME",
+                                Path.home() / ".cache")) / "EfsTA"
 
 
 class Controller():
@@ -25,6 +35,21 @@ class Controller():
         self.path = path
         self.get_data(path)
 
+    @property
+    def labels(self):
+        """
+        The axis labels x, y, z. Setting them also stores the units of the
+        x-axis and the delays as x_axis_unit and time_unit.
+
+        """
+        return self._labels
+
+    @labels.setter
+    def labels(self, labels):
+        self._labels = labels
+        self.x_axis_unit = labels[0].split("/", 1)[1] if "/" in labels[0] else ""
+        self.time_unit = labels[1].split("/", 1)[1] if "/" in labels[1] else ""
+
     def get_data(self, path):
         """
         Method that loads the needed data from the given folder path into
@@ -40,17 +65,162 @@ class Controller():
         None.
 
         """
-        file_paths = []
-        content = os.listdir(path)
-        for file in content:
-            file_paths.append(f'{path}/{file}')
-        for i in file_paths:
-            if ("lambda.txt" or "field.txt") in i:
-                self.lambdas_filename = i
-            elif "delays.txt" in i:
-                self.delays_filename = i
-            elif "spectra.txt" in i:
-                self.spectra_filename = i
+        with os.scandir(path) as content:
+            for entry in content:
+                name = entry.name
+                if name.endswith(("lambda.txt", "field.txt")):
+                    self.lambdas_filename = entry.path
+                elif name.endswith("delays.txt"):
+                    self.delays_filename = entry.path
+                elif name.endswith("spectra.txt"):
+                    self.spectra_filename = entry.path
+        if hasattr(self, "delays_filename"):
+            self.dataset_name = Path(self.delays_filename).stem.removesuffix("_delays")
+        self._arrays = None
+        self.model_cache = {}
+
+    @property
+    def arrays(self):
+        """
+        The values of the delays, spectra and lambdas files. The files are
+        only read when the first model needs them, so selecting a folder
+        doesn't parse the data yet.
+
+        """
+        if self._arrays is None:
+            self._arrays = (self.loadMatrix(self.delays_filename),
+                            self.loadMatrix(self.spectra_filename),
+                            self.loadMatrix(self.lambdas_filename))
+        return self._arrays
+
+    def loadMatrix(self, filename):
+        """
+        Reads the values of a data file. The values are kept in memory for
+        the current modification time and size of the file, so another
+        Controller for the same folder doesn't parse them again.
+
+        Parameters
+        ----------
+        filename : string
+            The path to the data file.
+
+        Returns
+        -------
+        values : np.array
+            The values in the data file.
+
+        """
+        stat = os.stat(filename)
+        values = self.readMatrix(filename, stat.st_mtime_ns, stat.st_size)
+        return values
+
+    @staticmethod
+    @lru_cache(maxsize=12)
+    def readMatrix(filename, mtime, size):
+        """
+        Parses the values of a data file and sets missing and infinite
+        values to 0. The parsed values are stored in a binary .npz file in
+        CACHE_DIR together with the modification time and size of the data
+        file. It will be loaded instead as long as both still match, so the
+        data folder itself is left untouched.
+
+        Parameters
+        ----------
+        filename : string
+            The path to the data file.
+        mtime : int
+            The modification time of the file in ns.
+        size : int
+            The size of the file in bytes.
+
+        Returns
+        -------
+        values : np.array
+            The values in the data file.
+
+        """
+        key = hashlib.sha1(os.path.abspath(filename).encode()).hexdigest()
+        cache = CACHE_DIR / (key + ".npz")
+        try:
+            with np.load(cache) as stored:
+                if stored["mtime"] == mtime and stored["size"] == size:
+                    return stored["values"]
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            pass
+        try:
+            values = np.loadtxt(filename)
+        except ValueError:
+            values = np.genfromtxt(filename)
+        # missing or broken entries would spoil every least-squares solve
+        np.nan_to_num(values, copy=False, nan=0.0, posinf=0.0, neginf=0.0)
+        try:
+            CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            np.savez(cache, values=values, mtime=mtime, size=size)
+        except OSError:
+            pass
+        return values
+
+    def getModel(self, model):
+        """
+        Returns the fitted object and the title addition for the given model.
+
+        Parameters
+        ----------
+        model : int/string
+            Describes the desired model. 0 for the GLA. For GTA it can be a
+            number 1-8 ,"custom model" or "custom matrix".
+
+        Returns
+        -------
+        obj : Model
+            The object self.DAS for the GLA or self.SAS for the GTA.
+        tag : string
+            "_GLA" for the GLA or "_GTA" for the GTA.
+
+        """
+        if model == 0:
+            return self.DAS, "_GLA"
+        return self.SAS, "_GTA"
+
+    def makeModel(self, d_limits, l_limits, model, opt_method, ivp_method):
+        """
+        Creates an object of the class Model from the already loaded data.
+        The last MAX_MODELS objects are kept in model_cache, so fitting the
+        same data range again reuses them.
+
+        Parameters
+        ----------
+        d_limits : tuple with two int/float elements
+            Lower and upper limits for the delay values.
+        l_limits : tuple with two int/float elements
+            Lower and upper limits for the lambda values.
+        model : int/string
+            Describes the desired model. None for the original data, 0 for
+            the GLA. For GTA it can be a number 1-8, "custom model" or
+            "custom matrix".
+        opt_method : string
+            The algorithm used by the minimize function.
+        ivp_method : string
+            The algorithm used by the initial value problem solver.
+
+        Returns
+        -------
+        model : Model
+            The object of the class Model.
+
+        """
+        key = (d_limits, l_limits, model, opt_method, ivp_method)
+        obj = self.model_cache.pop(key, None)
+        if obj is None:
+            obj = Model(self.delays_filename, self.spectra_filename,
+                        self.lambdas_filename, list(d_limits),
+                        list(l_limits), model, opt_method, ivp_method,
+                        arrays=self.arrays)
+        # the most recently used object is kept last
+        self.model_cache[key] = obj
+        if len(self.model_cache) > MAX_MODELS:
+            del self.model_cache[next(iter(self.model_cache))]
+        return obj
 
     def calcDAS(self, preparam, d_limits, l_limits, opt_method):
         """
@@ -87,15 +257,15 @@ class Controller():
         tau = [tau[0] for tau in preparam]
         
         
-        self.DAS = Model(self.delays_filename, self.spectra_filename,
-                         self.lambdas_filename, d_limits, l_limits, 0, opt_method, None)
+        self.DAS = self.makeModel(tuple(d_limits), tuple(l_limits), 0,
+                                  opt_method, None)
         self.DAS.M = self.DAS.getM(tau)
         tau_fit, fit_report = self.DAS.findTau_fit(preparam, opt_method)
         D_fit = self.DAS.calcD_fit()
         spec = self.DAS.calcA_fit()
         res = self.DAS.calcResiduals()
         self.saveResults(0, tau, tau_fit,
-                         l_limits, d_limits, spec, D_fit,
+                         self.DAS.l_limits, self.DAS.d_limits, spec, D_fit,
                          self.DAS.getTauBounds(tau), self.DAS.lambdas,
                          self.DAS.delays, self.DAS.spectra, fit_report)
         return tau_fit, spec, res, D_fit, fit_report
@@ -147,9 +317,8 @@ class Controller():
 
         """
         tau = [tau[0] for tau in preparam]
-        self.SAS = Model(self.delays_filename, self.spectra_filename,
-                         self.lambdas_filename, d_limits, l_limits, model, 
-                         opt_method, ivp_method)
+        self.SAS = self.makeModel(tuple(d_limits), tuple(l_limits), model,
+                                  opt_method, ivp_method)
         if (model == "custom model" or model == "custom matrix"):
             M_lin = self.SAS.getM_lin(K)
             K,n = self.SAS.getK(M_lin)
@@ -165,7 +334,8 @@ class Controller():
         D_fit = self.SAS.calcD_fit()
         spec = self.SAS.calcA_fit()
         res = self.SAS.calcResiduals()        
-        self.saveResults(model, tau, tau_fit, l_limits, d_limits, spec, D_fit,
+        self.saveResults(model, tau, tau_fit, self.SAS.l_limits,
+                         self.SAS.d_limits, spec, D_fit,
                          self.SAS.getTauBounds(tau), self.SAS.lambdas,
                          self.SAS.delays, self.SAS.spectra, fit_report)
         return tau_fit, spec, res, D_fit, fit_report
@@ -200,12 +370,12 @@ class Controller():
         None.
         
         """
-        if len(list(wave)) <= 0:
-            if len(list(time)) <= 0:
+        if len(wave) == 0:
+            if len(time) == 0:
                 custom = "2"
             else:
                 custom = "2+3"
-        elif len(list(time)) <= 0:
+        elif len(time) == 0:
             custom = "1+2"
         else:
             custom = "1+2+3"
@@ -263,21 +433,19 @@ class Controller():
         None.
 
         """
-        if len(wave) <= 0 or len(wave) > 10:
-            if len(time) <= 0:
+        n = len(wave)
+        if n == 0 or n > 10:
+            if len(time) == 0:
                 custom = "2"
             else:
                 custom = "2+3"
-        elif len(time) <= 0:
+        elif len(time) == 0:
             custom = "1+2"
         else:
             custom = "1+2+3"
-        if model == 0:
-            self.DAS.plotCustom(self.DAS.spec, wave, time,
-                                v_min, v_max, custom, cont, mul, self.labels, add="_GLA")
-        else:
-            self.SAS.plotCustom(self.SAS.spec, wave, time,
-                                v_min, v_max, custom, cont, mul, self.labels ,add="_GTA")
+        obj, tag = self.getModel(model)
+        obj.plotCustom(obj.spec, wave, time, v_min, v_max, custom, cont, mul,
+                       self.labels, add=tag)
         
     def plot3DFittedData(self,v_min, v_max, model, mul):
         """
@@ -300,10 +468,8 @@ class Controller():
         None.
 
         """
-        if model == 0:
-            self.DAS.plot3D(self.DAS.spec, v_min, v_max, mul, self.labels ,add="_GLA")
-        else:
-            self.SAS.plot3D(self.SAS.spec, v_min, v_max, mul, self.labels ,add="_GTA")
+        obj, tag = self.getModel(model)
+        obj.plot3D(obj.spec, v_min, v_max, mul, self.labels, add=tag)
             
     def createOrigData(self, d_limits, l_limits, opt_method, ivp_method):
         """
@@ -324,8 +490,8 @@ class Controller():
         None.
 
         """
-        self.origData = Model(self.delays_filename, self.spectra_filename,
-                         self.lambdas_filename, d_limits, l_limits, None, opt_method, ivp_method)
+        self.origData = self.makeModel(tuple(d_limits), tuple(l_limits), None,
+                                       opt_method, ivp_method)
             
     def plotCustom(self, wave, time, v_min, v_max, model, cont, custom, mul,
                    add=""):
@@ -364,14 +530,10 @@ class Controller():
             self.origData.plotCustom(self.origData.spectra, wave, time,
                                 v_min, v_max, custom, cont, mul,self.labels ,
                                 add="_"+add)
-        elif model == 0:
-            self.DAS.plotCustom(self.DAS.spec, wave, time,
-                                v_min, v_max, custom, cont, mul, self.labels ,
-                                add="_GLA"+"_"+add)
         else:
-            self.SAS.plotCustom(self.SAS.spec, wave, time,
-                                v_min, v_max, custom, cont, mul,
-                                add="_GTA"+"_"+add)
+            obj, tag = self.getModel(model)
+            obj.plotCustom(obj.spec, wave, time, v_min, v_max, custom, cont,
+                           mul, self.labels, add=tag+"_"+add)
         
     def plotSolo(self, wave, time, v_min, v_max, model, cont, solo, mul,
                    add=""):
@@ -410,14 +572,25 @@ class Controller():
             self.origData.plotSolo(self.origData.spectra, wave, time,
                                 v_min, v_max, solo, cont, mul, self.labels,
                                 add="_"+add)
-        elif model == 0:
-            self.DAS.plotSolo(self.DAS.spec, wave, time,
-                                v_min, v_max, solo, cont, mul, self.labels,
-                                add="_GLA"+"_"+add)
         else:
-            self.SAS.plotSolo(self.SAS.spec, wave, time,
-                                v_min, v_max, solo, cont, mul, self.labels,
-                                add="_GTA"+"_"+add)
+            obj, tag = self.getModel(model)
+            obj.plotSolo(obj.spec, wave, time, v_min, v_max, solo, cont, mul,
+                         self.labels, add=tag+"_"+add)
+
+    def waitSaves(self):
+        """
+        Waits until the plots of the original and the fitted data are
+        written to the analysis folder and raises the first error of their
+        writes.
+
+        Returns
+        -------
+        None.
+
+        """
+        for name in ("origData", "DAS", "SAS"):
+            if hasattr(self, name):
+                getattr(self, name).waitSaves()
 
     def plot1Dresiduals(self, model, mul):
         """
@@ -438,18 +611,11 @@ class Controller():
         None.
 
         """
-        ltx = str(mul).count("0")
-        dot = ""
-        if mul != 1:
-            dot = " \cdot " + "10^" + str(ltx) + "$"
-        if model == 0:
-            self.DAS.plotData(self.DAS.delays, self.DAS.residuals.T,
-                              self.labels[1], self.labels[2]+ dot,
-                              add="_GLA_Residuals_")
-        else:
-            self.SAS.plotData(self.SAS.delays, self.SAS.residuals.T,
-                              self.labels[1], self.labels[2]+ dot,
-                              add="_GTA_Residuals_")
+        dot = Model.mulLabel(mul)
+        obj, tag = self.getModel(model)
+        obj.plotData(obj.delays, obj.residuals.T, self.labels[1],
+                     self.labels[2] + dot, label=None,
+                     add=tag+"_Residuals_")
          
     def plot2Dresiduals(self, v_min, v_max, model, cont, mul):
         """
@@ -476,12 +642,9 @@ class Controller():
             The figure containing the plot.
 
         """
-        if model == 0:
-            self.DAS.plotHeat([], [], None, None, self.DAS.residuals, cont, mul,
-                              self.labels,  add="_GLA_Residuals")
-        else:
-            self.SAS.plotHeat([], [], None, None, self.SAS.residuals, cont, mul,
-                               self.labels, add="_GTA_Residuals")
+        obj, tag = self.getModel(model)
+        obj.plotHeat([], [], None, None, obj.residuals, cont, mul,
+                     self.labels, add=tag+"_Residuals")
         
     def plotKinetics(self, model):
         """
@@ -500,12 +663,9 @@ class Controller():
             The figure containing the plot.
 
         """
-        if model == 0:
-            self.DAS.plotData(self.DAS.delays, self.DAS.M.T, self.labels[1],
-                              "concentration",label = None, add="_GLA_kin")
-        else:
-            self.SAS.plotData(self.SAS.delays, self.SAS.M.T, self.labels[1],
-                              "concentration",label = None, add="_GTA_kin")
+        obj, tag = self.getModel(model)
+        obj.plotData(obj.delays, obj.M.T, self.labels[1], "concentration",
+                     label=None, add=tag+"_kin")
         
     def plotDAS(self, model, tau, mul):
         """
@@ -525,50 +685,36 @@ class Controller():
         None.
 
         """
-        ltx = str(mul).count("0")
-        dot = ""
-        if mul != 1:
-            dot = f" $\cdot 10^{ltx}$"
-        unit = self.labels[1].split("/")[1]
-        for i, t in enumerate(tau):
-            if t < 1:
-                tau[i] = round(t,3)
-            elif t < 10 and t > 1:
-                tau[i] = round(t,2)
-            elif t < 100 and t > 10:
-                tau[i] = round(t,1)
-            else:
-                tau[i] = round(t)
-        if model == 0:
-            label = []
-            for ind,tau in enumerate(tau):
-                label.append(f"$\\tau_{ind}=$ {tau}{unit}")
-            self.DAS.plotData(self.DAS.lambdas, self.DAS.D_fit,
-                              self.labels[0], self.labels[2] + dot, 
-                              label = label, add="_DAS")
-        elif (model == "custom model" or model == "custom matrix"):
-            custom_tau = list(self.SAS.getM_lin(np.array(tau)))
-            label = []
-            for ind,tau in enumerate(tau):
-                label.append(f"$\\tau_{ind}=$ {custom_tau}{unit}")
-            self.SAS.plotData(self.SAS.lambdas, self.SAS.D_fit,
-                              self.labels[0], self.labels[2] + dot,
-                              label = label, add="_SAS")
+        dot = Model.mulLabel(mul)
+        unit = self.time_unit
+        t = np.array(tau, dtype=np.float64)
+        decimals = np.select([t < 1, (t > 1) & (t < 10), (t > 10) & (t < 100)],
+                             [3, 2, 1], 0)
+        for d in np.unique(decimals):
+            t[decimals == d] = np.round(t[decimals == d], d)
+        if t.ndim > 1:
+            tau = t
+        else:
+            tau = [v if d else int(v) for v, d in zip(t.tolist(), decimals)]
+        if (model == "custom model" or model == "custom matrix"):
+            custom_tau = self.SAS.getM_lin(tau)
+            label = [f"$\\tau_{ind}=$ {custom_tau}{unit}"
+                     for ind in range(len(tau))]
         else:
-            label = []
-            for ind,tau in enumerate(tau):
-                label.append(f"$\\tau_{ind}=$ {tau}{unit}")
+            label = [f"$\\tau_{ind}=$ {ti}{unit}" for ind, ti in enumerate(tau)]
             if model == 2:
                 label.append("inf")
-            self.SAS.plotData(self.SAS.lambdas, self.SAS.D_fit,
-                              self.labels[0], self.labels[2] + dot, 
-                              label= label, add="_SAS") 
+        obj, _ = self.getModel(model)
+        add = "_DAS" if model == 0 else "_SAS"
+        obj.plotData(obj.lambdas, obj.D_fit, self.labels[0],
+                     self.labels[2] + dot, label=label, add=add)
 
     def saveResults(self, model, tau_start, tau_fit, l_limits, d_limits, A_fit,
                     D_fit, bounds, lambdas, delays, spectra, fit_report):
         """
         Saves the results of the DAS or SAS at the end of the optimizing in a
-        .txt file.
+        .txt file and the fitted and limited arrays in a compressed .npz
+        archive.
 
         Parameters
         ----------
@@ -594,54 +740,39 @@ class Controller():
         None.
 
         """
-        for i,n in enumerate(tau_fit):
-            tau_fit[i] = round(n,2)
-        time_unit = self.labels[1].split("/")[1]
-        x_axis_unit = self.labels[0].split("/")[1]
-        if model == 0:
-            path = self.DAS.path
-            name = self.DAS.name+"_GLA"
-            txt = name+"_results.txt"
-        else:
-            path = self.SAS.path
-            name = self.SAS.name+"_GTA"
-            txt = name+"_results.txt"
+        tau_fit[:] = np.round(np.asarray(tau_fit, dtype=np.float64), 2).tolist()
+        time_unit = self.time_unit
+        obj, tag = self.getModel(model)
+        path = Path(obj.path)
+        name = obj.name+tag
+        myfile = path / (name+"_results.txt")
         
-        myfile = Path(path+txt)
-        myfile.touch(exist_ok=True)
-        f = open(myfile, "w")
-        
-        if (model != "custom model" or model != "custom matrix"):
-            k_fit = 1/np.array(tau_fit)
-        else:
-            ones = np.full(tau_fit.shape, 1)
-            k_fit = np.divide(ones, tau_fit, out=np.zeros_like(tau_fit), where=tau_fit!=0)
+        tau_arr = np.asarray(tau_fit, dtype=np.float64)
+        k_fit = np.divide(1.0, tau_arr, out=np.zeros_like(tau_arr),
+                          where=tau_arr!=0)
         
         now = datetime.now()
         dt_string = now.strftime("%d.%m.%Y %H:%M:%S")
         
-        f.write(dt_string + "\n" + name + "\nSolver: scipy.optimize.minimize"+
-            "\nModel: " + str(model) + "\nStarting Parameters: "+
-            str(tau_start) + "\nBounds: "+ str(bounds) +
-            "\nWavelength/Field range: " + str(l_limits[0])+" - "+str(l_limits[1]) +
-            " " + x_axis_unit + "\ndelay range: " + str(d_limits[0])+" - "
-            + str(d_limits[1]) + " " + time_unit + "\n\nTime constants / " + 
-            time_unit + ": " + str(tau_fit) + "\nRate constants / " + time_unit +
-            "^-1: " + str(k_fit) + "\n" + "\n" + 
-            "lmfit fit_report:" + "\n" + "\n" + fit_report + "\n" + "\n" + 
-            "All results and plots can be found here:" + "\n" + "\n" + 
-            str(path)) 
-        
-        np.savetxt(path+name+"_A_fit.txt", A_fit)
-        if model == 0:
-            np.savetxt(path+name+"_DAS.txt", D_fit)
-        else:
-            np.savetxt(path+name+"_SAS.txt", D_fit)
-        np.savetxt(path+name+"_limited_lambda.txt", lambdas)
-        np.savetxt(path+name+"_limited_delays.txt", delays)
-        np.savetxt(path+name+"_limited_spectra.txt", spectra)
-        
-        f.close()
+        parts = [dt_string, "\n", name, "\nSolver: scipy.optimize.minimize",
+                 "\nModel: ", str(model), "\nStarting Parameters: ",
+                 str(tau_start), "\nBounds: ", str(bounds),
+                 "\nWavelength/Field range: ", str(l_limits[0]), " - ",
+                 str(l_limits[1]), " ", self.x_axis_unit, "\ndelay range: ",
+                 str(d_limits[0]), " - ", str(d_limits[1]), " ", time_unit,
+                 "\n\nTime constants / ", time_unit, ": ", str(tau_fit),
+                 "\nRate constants / ", time_unit, "^-1: ", str(k_fit),
+                 "\n\nlmfit fit_report:\n\n", fit_report,
+                 "\n\nAll results and plots can be found here:\n\n",
+                 str(path)]
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            futures = [ex.submit(myfile.write_text, "".join(parts)),
+                       ex.submit(np.savez_compressed,
+                                 path / (name+"_arrays.npz"), A_fit=A_fit,
+                                 D_fit=D_fit, lambdas=lambdas, delays=delays,
+                                 spectra=spectra)]
+        for future in futures:
+            future.result()
     
     def getResults(self, model):
         """
@@ -659,21 +790,65 @@ class Controller():
             A string with the content of the results file.
 
         """
-        if model == 0:
-            path = self.DAS.path
-            name = self.DAS.name+"_GLA"
-            txt = name+"_results.txt"
-        else:
-            path = self.SAS.path
-            name = self.SAS.name+"_GTA"
-            txt = name+"_results.txt"
-        with open(path+txt) as f:
+        obj, tag = self.getModel(model)
+        myfile = Path(obj.path) / (obj.name+tag+"_results.txt")
+        stat = myfile.stat()
+        text = self.readFile(myfile, stat.st_mtime_ns, stat.st_size)
+        return text
+
+    @staticmethod
+    @lru_cache(maxsize=4)
+    def readFile(filename, mtime, size):
+        """
+        Reads a text file. The content is cached for the given modification
+        time and size, so unchanged files are only read once. Like
+        readMatrix it is a staticmethod, so the cache doesn't keep the
+        Controller alive.
+
+        Parameters
+        ----------
+        filename : string, Path
+            The path to the file.
+        mtime : int
+            The modification time of the file in nanoseconds.
+        size : int
+            The size of the file in bytes.
+
+        Returns
+        -------
+        text : string
+            The content of the file.
+
+        """
+        with open(filename) as f:
             text = f.read()
         return text
+
+    def loadResults(self, model):
+        """
+        Reads the arrays saved by saveResults from the .npz archive.
+
+        Parameters
+        ----------
+        model : int/string
+            Describes the desired model. 0 for the GLA. For GTA it can be a
+            number 1-8 ,"custom model" or "custom matrix".
+
+        Returns
+        -------
+        arrays : dict
+            A dictionary with the arrays A_fit, D_fit, lambdas, delays and
+            spectra.
+
+        """
+        obj, tag = self.getModel(model)
+        with np.load(Path(obj.path) / (obj.name+tag+"_arrays.npz")) as data:
+            arrays = dict(data)
+        return arrays
     
     def pickleData(self, dict_):
         """
-        This method saves the given data in the shelve. 
+        This method saves the given data in a pickle file. 
         Keyword arguments must be given as key=value.
 
         Parameters
@@ -706,20 +881,14 @@ class Controller():
         None.
 
         """
-        path = self.path+"/"
-        temp = self.delays_filename[::-1]
-        temp = temp.index("/")
-        name = self.delays_filename[-temp:-11]
-        txt = name+"_input_backup"
-        s = shelve.open(path+txt, writeback=True)
-        s.clear()
-        for key, value in dict_.items():
-            s[key] = value
-        s.close()
+        path = Path(self.path)
+        txt = self.dataset_name+"_input_backup.pkl"
+        with open(path / txt, "wb") as f:
+            pickle.dump(dict_, f, protocol=pickle.HIGHEST_PROTOCOL)
         
     def getPickle(self):
         """
-        Transforms the shelve in a dictionary which can be accessed to obtain
+        Loads the pickle file in a dictionary which can be accessed to obtain
         the saved information.
 
         Returns
@@ -729,12 +898,8 @@ class Controller():
             programm.
 
         """
-        path = self.path+"/"
-        temp = self.delays_filename[::-1]
-        temp = temp.index("/")
-        name = self.delays_filename[-temp:-11]
-        txt = name+"_input_backup"
-        s = shelve.open(path+txt, writeback=False)
-        shelf = dict(s).copy()
-        s.close()
+        path = Path(self.path)
+        txt = self.dataset_name+"_input_backup.pkl"
+        with open(path / txt, "rb") as f:
+            shelf = pickle.load(f)
         return shelf
\ No newline at end of file
@@ -248,11 +248,8 @@ class MainWindow(QW.QMainWindow):
                                   'contains *.txt files ending with "spectra.txt",' + 
                                   '"delays.txt" and "lambda.txt".')
             else:
-                temp = self.Controller.delays_filename[::-1]
-                temp = temp.index("/")
-                name = self.Controller.delays_filename[-temp:-11]
-                txt = name+"_input_backup"
-                pickle = path + txt + ".dir"
+                txt = self.Controller.dataset_name+"_input_backup.pkl"
+                pickle = path + txt
                 if os.path.isfile(pickle):
                     self.setPickle()
 
@@ -1185,6 +1182,10 @@ class MainWindow(QW.QMainWindow):
                 self.Controller.plotDAS(model, self.tau_fit, self.getMultiplier())
             if self.ui.plot_concentrations.isChecked() == True:
                 self.Controller.plotKinetics(model)
+        try:
+            self.Controller.waitSaves()
+        except OSError as error:
+            self.openFailSafe("The plots could not be saved: " + str(error))
 
 #####################################CONFIRM###################################
 
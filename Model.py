@@ -1,23 +1,128 @@
-import matplotlib as mpl
-import matplotlib.pyplot as plt
-import matplotlib.colors as col
-import matplotlib.ticker as mticker
 import os
+from pathlib import Path
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import numpy as np
 from lmfit import minimize, Parameters, fit_report
 import scipy.integrate as scint
+import scipy.linalg as sclin
 from models import Models
-mpl.use("QtAgg")
-plt.style.use('./AK_Richert.mplstyle')
-#plt.style.use('default')
-plt.ion()
+
+# matplotlib is only imported by loadPlotting, when the first plot is made
+mpl = plt = col = mticker = None
+
+# Optimizer used if none is given, it uses the analytical gradient of the GLA
+DEFAULT_OPT_METHOD = "L-BFGS-B"
+# More contour levels only cost time to trace without showing anything new
+MAX_CONTOURS = 40
+# Figure width, width ratios of the three subplots and their spacing for
+# every combination of plotCustom
+CUSTOM_LAYOUTS = {
+    "1": (2.5, 1.0, 0, 0, 0),
+    "2": (5.2, 0, 4.7, 0, 0),
+    "3": (2, 0, 0, 1.5, 0),
+    "1+2": (7, 1.0, 3.7, 0, 0),
+    "1+3": (5, 1.0, 0, 1.5, 0.25),
+    "2+3": (7, 0, 4.7, 1.5, 0),
+    "1+2+3": (9, 1.0, 3.7, 1.5, 0),
+}
+# Encodes and writes the rendered plots while the next one is drawn, it is
+# only started by getSavePool on the first saveFigure
+SAVE_POOL = None
+
+
+def fitStart(model, preparam, opt_method):
+    """
+    Runs a single start of Model.findTau_fitMultistart in a worker process.
+
+    Parameters
+    ----------
+    model : Model
+        A copy of the model to be fitted.
+    preparam : list
+        The starting parameters in the format of Model.findTau_fit.
+    opt_method : string
+        The algorithm used by the optimization function.
+
+    Returns
+    -------
+    tau_sum : list
+        The fitted parameters as returned by Model.findTau_fit.
+    fit_rep : string
+        The lmfit fit report.
+    tau_fit : list
+        The fitted tau values.
+    chisqr : float
+        The ChiSquare of the fit.
+
+    """
+    tau_sum, fit_rep = model.findTau_fit(preparam, opt_method)
+    return tau_sum, fit_rep, model.tau_fit, model.chisqr
+
+
+def loadPlotting():
+    """
+    Imports matplotlib and sets up the backend and the style on first use.
+    Fitting alone does not need the plotting stack, so it is not loaded
+    before the first plot.
+
+    Returns
+    -------
+    None.
+
+    """
+    global mpl, plt, col, mticker
+    if plt is not None:
+        return
+    import matplotlib as mpl
+    mpl.use("QtAgg")
+    import matplotlib.pyplot as plt
+    import matplotlib.colors as col
+    import matplotlib.ticker as mticker
+    plt.style.use('./AK_Richert.mplstyle')
+    #plt.style.use('default')
+    plt.ion()
+
+
+def getSavePool():
+    """
+    Returns SAVE_POOL and starts it on first use, so importing Model, e.g.
+    in the tests or the multistart workers, doesn't start any threads.
+
+    Returns
+    -------
+    SAVE_POOL : ThreadPoolExecutor
+        The pool that writes the saved plots.
+
+    """
+    global SAVE_POOL
+    if SAVE_POOL is None:
+        SAVE_POOL = ThreadPoolExecutor(max_workers=4)
+    return SAVE_POOL
+
+
+def stopSavePool():
+    """
+    Waits for the pending writes of SAVE_POOL and stops its threads. The
+    next saveFigure starts a new pool.
+
+    Returns
+    -------
+    None.
+
+    """
+    global SAVE_POOL
+    if SAVE_POOL is not None:
+        SAVE_POOL.shutdown(wait=True)
+        SAVE_POOL = None
+
 
 class Model:
 
     # Initiation Of The Class
 
     def __init__(self, delays_filename, spectra_filename, lambdas_filename,
-                 d_limits, l_limits, model, opt_method, ivp_method):
+                 d_limits, l_limits, model, opt_method, ivp_method, arrays=None):
         """
         Initiates an object of the class Model with preset data and model.
         Presets a list of colors for the 3-in-1 plot.
@@ -36,23 +141,75 @@ class Model:
             Lower and upper limits for the lambda values.
         model : int/string
             Variable for the choice of model (DAS or which SAS).
+        arrays : tuple of np.array, optional
+            The already loaded delays, spectra and lambdas. If None, they
+            will be read from the given files. The default is None.
 
         Returns
         -------
         None.
 
         """
-        self.d_borders = self.findBorders(d_limits, delays_filename)
-        self.l_borders = self.findBorders(l_limits, lambdas_filename)
+        if arrays is None:
+            arrays = (np.genfromtxt(delays_filename),
+                      np.genfromtxt(spectra_filename),
+                      np.genfromtxt(lambdas_filename))
+        delays, spectra, lambdas = arrays
+        self.d_borders = self.findBorders(d_limits, delays)
+        self.l_borders = self.findBorders(l_limits, lambdas)
+        self.d_limits = d_limits
+        self.l_limits = l_limits
         self.name = self.findName(delays_filename)
-        self.delays = self.initDelays(delays_filename)
-        self.spectra = self.initSpectra(spectra_filename)
-        self.lambdas = self.initLambdas(lambdas_filename)
+        self.delays = self.initDelays(delays)
+        self.spectra = self.initSpectra(spectra)
+        self.lambdas = self.initLambdas(lambdas)
+        # the ranges of the axes are needed in every solveDiff and plot call
+        self.t_min = float(self.delays.min())
+        self.t_max = float(self.delays.max())
+        self.l_min = float(self.lambdas.min())
+        self.l_max = float(self.lambdas.max())
+        # both axes are sorted once for all nearest index searches
+        self.sort_orders = {"delays": np.argsort(self.delays, kind="stable"),
+                            "lambdas": np.argsort(self.lambdas,
+                                                  kind="stable")}
         self.model = model
         self.opt_method = opt_method
         self.ivp_method = ivp_method
+        self.M_buf = None
+        self.G_buf = None
+        self.D_buf = None
+        self.resid_buf = None
+        self.step = None
+        self.mesh = None
+        self.index_cache = {}
+        self.regular_grid = (self.isRegular(self.lambdas) and
+                             self.isRegular(self.delays))
+        self.figures = {}
+        self.scaled_cache = {}
+        self.heatmaps = {}
+        self.range_cache = None
+        self.saves = []
+
+    def __getstate__(self):
+        """
+        Returns the attributes to be pickled, e.g. for the workers of
+        findTau_fitMultistart. The figures, the pending saves, the plot
+        caches and the fit buffers only belong to this process, so they are
+        left out.
+
+        Returns
+        -------
+        state : dict
+            The attributes of the object without its plotting state.
+
+        """
+        state = self.__dict__.copy()
+        state.update(figures={}, heatmaps={}, saves=[], scaled_cache={},
+                     index_cache={}, mesh=None, range_cache=None, step=None,
+                     M_buf=None, G_buf=None, D_buf=None, resid_buf=None)
+        return state
 
-    def findBorders(self, limits, filename):
+    def findBorders(self, limits, values):
         """
         Finds the indices for the chosen limits in a set of values.
         If none are chosen, the borders will automatically be set.
@@ -60,26 +217,23 @@ class Model:
         Parameters
         ----------
         limits : list with two int/float elements
-            Lower and upper limits for the values in the given file.
-        filename : string
-            The path to the file for the values.
+            Lower and upper limits for the given values.
+        values : np.array
+            The original values from the file.
 
         Returns
         -------
         borders : list with two int elements
-            Indexes for the lower and upper limit of the values in the file.
+            Indexes for the lower and upper limit of the values.
 
         """
-        values = np.genfromtxt(filename)
-        borders = [0, 1]
         if limits == None:
             limits = [None, None]
         if limits[0] == None:
-            limits[0] = min(values)
+            limits[0] = values.min()
         if limits[1] == None:
-            limits[1] = max(values)
-        borders[0] = round(np.absolute(values-limits[0]).argmin(),2)
-        borders[1] = round(np.absolute(values-limits[1]).argmin(),2)
+            limits[1] = values.max()
+        borders = self.findNearestIndex(limits, values)
         return borders
 
     def findName(self, delays_filename):
@@ -97,23 +251,21 @@ class Model:
             Name of the mesured data.
 
         """
-        temp = delays_filename[::-1]
-        temp = temp.index("/")
-        name = delays_filename[-temp:-11]
-        path = delays_filename[:-temp]
-        if not os.path.exists(path+'analysis'):
-            os.makedirs(path+'analysis')
-        self.path = delays_filename[:-temp]+"analysis/"
+        filename = Path(delays_filename)
+        name = filename.name[:-len("_delays.txt")]
+        path = filename.parent / "analysis"
+        path.mkdir(exist_ok=True)
+        self.path = str(path) + os.sep
         return name
 
-    def initDelays(self, delays_filename):
+    def initDelays(self, values):
         """
         Applys the border to the original data of the delays.
 
         Parameters
         ----------
-        delays_filename : string
-            The path to the file for the delay values.
+        values : np.array
+            The original delay values from the file.
 
         Returns
         -------
@@ -121,18 +273,18 @@ class Model:
             Contains the values of the delays within the chosen borders.
 
         """
-        values = np.genfromtxt(delays_filename)
-        delays = values[self.d_borders[0]: self.d_borders[1]]
+        delays = np.ascontiguousarray(
+            values[self.d_borders[0]: self.d_borders[1]], dtype=np.float64)
         return delays
 
-    def initLambdas(self, lambdas_filename):
+    def initLambdas(self, values):
         """
         Applys the border to the original data of the lambdas.
 
         Parameters
         ----------
-        lambdas_filename : string
-            The path to the file for the lambda values.
+        values : np.array
+            The original lambda values from the file.
 
         Returns
         -------
@@ -140,18 +292,18 @@ class Model:
             Contains the values of the lambdas within the chosen borders.
 
         """
-        values = np.genfromtxt(lambdas_filename)
-        lambdas = values[self.l_borders[0]: self.l_borders[1]]
+        lambdas = np.ascontiguousarray(
+            values[self.l_borders[0]: self.l_borders[1]], dtype=np.float64)
         return lambdas
 
-    def initSpectra(self, spectra_filename):
+    def initSpectra(self, values):
         """
         Applys the border to the original data of the spectra.
 
         Parameters
         ----------
-        spectra_filename : string
-            The path to the file for the spectra values.
+        values : np.array
+            The original spectra values from the file.
 
         Returns
         -------
@@ -159,14 +311,14 @@ class Model:
             Contains the values of the spectra within the chosen borders.
 
         """
-        values = np.genfromtxt(spectra_filename)
-        spectra = values[self.l_borders[0]: self.l_borders[1],
-                         self.d_borders[0]: self.d_borders[1]]
+        spectra = np.ascontiguousarray(
+            values[self.l_borders[0]: self.l_borders[1],
+                   self.d_borders[0]: self.d_borders[1]], dtype=np.float64)
         return spectra
 
     # Decay Associated Spectra
 
-    def genE_tau(self, tau):
+    def genE_tau(self, tau, out=None):
         """
         Generatest the matrix E with different values for the delays in every
         column and different values for tau in the rows.
@@ -175,9 +327,9 @@ class Model:
         ----------
         tau : list
             A list of the given values for tau, the decay constant.
-
-        delays : np.array
-              The measured delays of the TA-spectrum.
+        out : np.array, optional
+            A preallocated array of shape (len(tau), len(delays)) the matrix
+            is written into. The default is None, which allocates a new one.
 
         Returns
         -------
@@ -185,11 +337,10 @@ class Model:
             The matrix of E_tau with the exponential decay functions.
 
         """
-        E_tau = np.zeros(shape=(len(tau), len(self.delays)))
-        for i in range(len(tau)):
-            for j in range(len(self.delays)):
-                E_tau[i][j] = -self.delays[j] / tau[i]
-        E_tau = np.exp(E_tau)
+        tau = np.asarray(tau, dtype=np.float64)
+        E_tau = np.divide(self.delays, tau[:, np.newaxis], out=out)
+        np.negative(E_tau, out=E_tau)
+        np.exp(E_tau, out=E_tau)
         return E_tau
 
     # Species Associated Spectra
@@ -239,9 +390,39 @@ class Model:
         dCdt = self.K @ C_0
         return dCdt
 
+    def propagate(self, K, t):
+        """
+        Propagates the initial concentrations C_0 with the matrix exponential
+        of K, C(t) = V·exp(w·t)·V⁻¹·C_0 with the eigenvalues w and
+        eigenvectors V of K, which is evaluated for all times at once.
+
+        Parameters
+        ----------
+        K : np.array
+            The matrix with the reaction constants for each concentration.
+        t : np.array
+            The times since the start of the reaction.
+
+        Returns
+        -------
+        C_t : np.array, None
+            Contains the concentration of each species at each time in t.
+            None if K is not diagonalizable.
+
+        """
+        w, V = np.linalg.eig(K)
+        if np.linalg.cond(V) >= 1e8:
+            return None
+        c = sclin.solve(V, self.C_0, check_finite=False)
+        C_t = (V @ (np.exp(np.outer(w, t)) * c[:, np.newaxis])).real
+        return C_t
+
     def solveDiff(self, K, ivp_method):
         """
-        Solves the differential equation of dCdt = K·C.
+        Solves the differential equation of dCdt = K·C. Since K is constant,
+        the solution is propagated to all delays at once with propagate. If K
+        is not diagonalizable, the initial value problem solver is used
+        instead.
 
         Parameters
         ----------
@@ -258,8 +439,15 @@ class Model:
 
         """
         self.K = K
-        Z = scint.solve_ivp(self.calcdCdt, [min(self.delays), max(self.delays)],
-            self.C_0, t_eval=self.delays, method=ivp_method)
+        C_t = self.propagate(K, self.delays - self.t_min)
+        if C_t is not None:
+            return C_t
+        kws = {}
+        if ivp_method in ("Radau", "BDF"):
+            # the Jacobian of K·C is K itself, no need to estimate it
+            kws["jac"] = K
+        Z = scint.solve_ivp(self.calcdCdt, [self.t_min, self.t_max],
+            self.C_0, t_eval=self.delays, method=ivp_method, **kws)
         C_t = Z.get("y")
         return C_t
 
@@ -284,13 +472,10 @@ class Model:
         if (self.model == "custom model" or self.model == "custom matrix"):
             Tau = self.regenM(tau)
             n = Tau.shape[0]
-            ones = np.full(Tau.shape, 1)
-            K = np.divide(ones, Tau, out=np.zeros_like(Tau),
-                                where=Tau!=0)
+            K = np.reciprocal(Tau, out=np.zeros_like(Tau), where=Tau!=0)
         else:
-            ones = np.full(np.array(tau).shape, 1)
-            k = np.divide(ones, tau, out=np.zeros_like(tau, dtype='float64'),
-                          where=tau!=0)
+            tau = np.asarray(tau, dtype=np.float64)
+            k = np.reciprocal(tau, out=np.zeros_like(tau), where=tau!=0)
             mod = Models(k)
             K, n = mod.getK(self.model)
         self.n = n
@@ -314,20 +499,14 @@ class Model:
             An array with the decay constants tau of the custom matrix.
 
         """
-        ones = np.full(tau_guess.shape, 1)
-        k_guess = np.divide(ones, tau_guess, out=np.zeros_like(tau_guess),
-                            where=tau_guess!=0)
-        M_lin = []
-        M_ones = np.zeros(k_guess.shape)
-        for i in range(k_guess.shape[0]):
-            for j in range(k_guess.shape[1]):
-                if i == j and i != k_guess.shape[0]-1:
-                    k_guess[i][j] = 0
-                if k_guess[i][j] != 0:
-                    M_ones[i][j] = 1
-                    M_lin.append(abs(k_guess[i][j]))
-        tau = 1/np.array(M_lin)
-        self.M_ones = M_ones
+        tau_guess = np.asarray(tau_guess, dtype=np.float64)
+        k_guess = np.reciprocal(tau_guess, out=np.zeros_like(tau_guess),
+                                where=tau_guess!=0)
+        diag = np.arange(k_guess.shape[0]-1)
+        k_guess[diag, diag] = 0
+        mask = k_guess != 0
+        tau = 1/np.abs(k_guess[mask])
+        self.M_ones = mask.astype(np.float64)
         return tau
         
     def regenM(self, tau_guess):
@@ -346,15 +525,14 @@ class Model:
             The custom matrix for the SAS with the decay constants tau.
 
         """
-        a = 0
+        tau_guess = np.asarray(tau_guess, dtype=np.float64)
+        rows, cols = np.nonzero(self.M_ones == 1)
         M = np.zeros(self.M_ones.shape)
-        for i in range(self.M_ones.shape[0]):
-            for j in range(self.M_ones.shape[1]):
-                if self.M_ones[i][j] == 1:
-                    M[i][j] = tau_guess[a]
-                    if j != self.M_ones.shape[0]-1:
-                        M[j][j] -= tau_guess[a]
-                    a += 1
+        M[rows, cols] = tau_guess
+        # every transition out of a species except the last one also
+        # depletes it on the diagonal
+        out = cols != self.M_ones.shape[0]-1
+        np.subtract.at(M, (cols[out], cols[out]), tau_guess[out])
         M[-1][-1] *= -1
         return M
     
@@ -410,7 +588,7 @@ class Model:
             bounds = list(zip(self.tau_low, self.tau_high))
         return bounds
 
-    def getM(self, tau):    
+    def getM(self, tau, out=None):    
        """
        Outputs the matrix which will be used in the matrix reconstruction
        algorithm to obtain the fitted spectra A_fit. For the DAS it is the
@@ -421,6 +599,9 @@ class Model:
        ----------
        tau : list, np.array
            An array containing the decay constants tau.
+       out : np.array, optional
+           A preallocated buffer for E_tau, only used for the DAS. The
+           default is None.
 
        Returns
        -------
@@ -429,13 +610,62 @@ class Model:
 
        """
        if self.model == 0:  # GLA
-           M = self.genE_tau(tau)
+           M = self.genE_tau(tau, out=out)
            self.n = len(tau)
        else:  # GTA
            self.K, n = self.getK(tau)
            M = self.solveDiff(self.K, self.ivp_method)
        return M
 
+    def solveD(self, M, B=None):
+        """
+        Solves D·M = spectra for D in the least-squares sense. The normal
+        equations D·(M·M^T) = spectra·M^T are solved with a Cholesky
+        factorization of the small Gram matrix M·M^T. Since that squares the
+        condition number of M, a QR based least-squares solve of D·M =
+        spectra is used instead if the Gram matrix is not positive definite,
+        e.g. for a species that is never populated, or if the diagonal of
+        its factor shows that M is ill-conditioned, e.g. for nearly equal
+        tau values.
+
+        Parameters
+        ----------
+        M : np.array
+            The matrix E_tau for the DAS or C_t for the SAS.
+        B : np.array, optional
+            Another right-hand side X·(M·M^T) = B to solve for instead of
+            spectra·M^T, as needed by getJacobian. It is overwritten.
+
+        Returns
+        -------
+        D : np.array
+            The matrix D for the given M, or X if B is given.
+
+        """
+        G = np.matmul(M, M.T, out=self.G_buf)
+        if B is None:
+            # spectra·M^T is the transpose of the right-hand side
+            # M·spectra^T in Fortran order, so LAPACK can solve in place
+            B_t = np.matmul(self.spectra, M.T, out=self.D_buf)
+        else:
+            B_t = B
+        try:
+            c = sclin.cho_factor(G.T, overwrite_a=True, check_finite=False)
+            diag = np.abs(np.diag(c[0]))
+            well_conditioned = diag.min() > 1e-4 * diag.max()
+        except sclin.LinAlgError:
+            well_conditioned = False
+        if well_conditioned:
+            D = sclin.cho_solve(c, B_t.T, overwrite_b=True,
+                                check_finite=False).T
+        elif B is None:
+            D = sclin.lstsq(M.T, self.spectra.T, lapack_driver="gelsy",
+                            check_finite=False)[0].T
+        else:
+            D = sclin.lstsq(M @ M.T, B.T, lapack_driver="gelsy",
+                            check_finite=False)[0].T
+        return D
+
     def calcD_tau(self, tau):
         """
         Calculates the matrix D_tau.
@@ -451,10 +681,7 @@ class Model:
             The matrix D_tau.
 
         """
-        res1 = self.spectra @ self.M.T
-        res2 = self.M @ self.M.T
-        inv = np.linalg.inv(res2)
-        D_tau = res1 @ inv
+        D_tau = self.solveD(self.M)
         return D_tau
 
     def calcA_tau(self, tau):
@@ -472,8 +699,7 @@ class Model:
             The reconstructed data matrix for the values of tau.
 
         """
-        D_tau = self.calcD_tau(tau)
-        A_tau = D_tau @ self.M
+        A_tau = self.calcD_tau(tau) @ self.M
         return A_tau
 
     def getDifference(self, tau):
@@ -495,10 +721,98 @@ class Model:
 
         """
         tau_sum = list(tau.valuesdict().values())
-        self.M = self.getM(tau_sum)
-        difference = self.calcA_tau(tau_sum) - self.spectra
+        self.M = self.getM(tau_sum, out=self.M_buf)
+        D = self.calcD_tau(tau_sum)
+        difference = np.matmul(D, self.M, out=self.resid_buf)
+        difference -= self.spectra
+        # getJacobian and getGradient are usually called for the same tau
+        self.step = (tau_sum, D, difference)
         return difference
-    
+
+    def getStep(self, tau):
+        """
+        Returns E_tau, D_tau and the residuals of getDifference for the
+        given tau, reusing the ones of the last step if tau is unchanged.
+
+        Parameters
+        ----------
+        tau : lmfit.Parameters
+            The parameters with the decay constants tau.
+
+        Returns
+        -------
+        M : np.ndarray
+            The matrix E_tau.
+        D : np.ndarray
+            The matrix D_tau.
+        difference : np.ndarray
+            The residuals of getDifference.
+
+        """
+        tau_sum = list(tau.valuesdict().values())
+        if self.step is None or self.step[0] != tau_sum:
+            self.getDifference(tau)
+        return self.M, self.step[1], self.step[2]
+
+    def getJacobian(self, tau):
+        """
+        Calculates the analytical Jacobian of getDifference for the GLA with
+        respect to the varied tau values. The derivative of E_tau has the
+        closed form delays/tau² · exp(-delays/tau) and only changes one row,
+        the derivative of D_tau follows from the normal equations
+        dD·(M·M^T) = -(R·dM^T + D·dM·M^T) with the residuals R.
+
+        Parameters
+        ----------
+        tau : lmfit.Parameters
+            The parameters with the decay constants tau.
+
+        Returns
+        -------
+        jac : np.ndarray
+            The derivatives of the flattened residuals in the columns, one
+            column for each varied tau.
+
+        """
+        values = np.array(list(tau.valuesdict().values()))
+        vary = np.flatnonzero([param.vary for param in tau.values()])
+        M, D, R = self.getStep(tau)
+        dM = M[vary] * self.delays / values[vary, np.newaxis]**2
+        # right-hand sides of dD for all varied tau, stacked along the rows
+        Y = D[:, vary].T[:, :, np.newaxis] * (dM @ M.T)[:, np.newaxis, :]
+        Y[np.arange(len(vary)), :, vary] += dM @ R.T
+        dD = self.solveD(M, Y.reshape(-1, len(values)))
+        jac = np.matmul(dD.reshape(len(vary), -1, len(values)), M)
+        jac *= -1
+        for i, j in enumerate(vary):
+            jac[i] += np.outer(D[:, j], dM[i])
+        return jac.reshape(len(vary), -1).T
+
+    def getGradient(self, tau):
+        """
+        Calculates the analytical gradient of the sum of the squared
+        residuals for the GLA with respect to the varied tau values. Since
+        D_tau is the least-squares solution, R·M^T vanishes and only the
+        derivative of E_tau contributes.
+
+        Parameters
+        ----------
+        tau : lmfit.Parameters
+            The parameters with the decay constants tau.
+
+        Returns
+        -------
+        grad : np.ndarray
+            The gradient for each varied tau.
+
+        """
+        values = np.array(list(tau.valuesdict().values()))
+        vary = np.flatnonzero([param.vary for param in tau.values()])
+        M, D, R = self.getStep(tau)
+        dM = M[vary] * self.delays / values[vary, np.newaxis]**2
+        grad = 2 * np.einsum("ij,ij->i", (D.T @ R)[vary], dM)
+        return grad
+
     def findTau_fit(self, preparam, opt_method):
         """
         The function takes the variable tau_guess and optimizes their values,
@@ -513,7 +827,9 @@ class Model:
             A list of the variables tau_guess for the DAS or all tau values for
             the SAS.
         opt_method: string
-            The algorithm used by the optimization function.
+            The algorithm used by the optimization function. For the GLA,
+            CG, BFGS, L-BFGS-B, TNC and SLSQP use the analytical gradient.
+            None selects DEFAULT_OPT_METHOD.
 
         Returns
         -------
@@ -527,8 +843,33 @@ class Model:
         for i in range(len(preparam)):
             params.add('tau'+str(i), preparam[i][0],
                            min=bounds[i][0], max=bounds[i][1],vary=preparam[i][1])
-        res_fit = minimize(self.getDifference, params, method=opt_method)
+        kws = {}
+        if opt_method is None:
+            opt_method = DEFAULT_OPT_METHOD
+        # getDifference writes M, the Gram matrix, D and the residual into
+        # the same buffers on every step
+        if self.model == 0:
+            n = len(preparam)
+            self.M_buf = np.empty((n, len(self.delays)))
+        else:
+            n = self.getK([param[0] for param in preparam])[1]
+        self.G_buf = np.empty((n, n))
+        self.D_buf = np.empty((len(self.lambdas), n))
+        # leastsq and least_squares keep the returned residual array between
+        # their steps, so they need a new one on every call
+        if opt_method not in ("leastsq", "least_squares"):
+            self.resid_buf = np.empty_like(self.spectra)
+        if self.model == 0:
+            # the analytical Jacobian is slower than the finite differences
+            # of leastsq, only the gradient pays off
+            if opt_method in ("CG", "BFGS", "L-BFGS-B", "TNC", "SLSQP"):
+                kws["jac"] = self.getGradient
+        res_fit = minimize(self.getDifference, params, method=opt_method,
+                           **kws)
+        self.M_buf = self.G_buf = self.D_buf = self.resid_buf = None
+        self.step = None
         fit_rep = fit_report(res_fit)
+        self.chisqr = res_fit.chisqr
         if hasattr(res_fit, "success"):
             if res_fit.success is False:
                 print("Fitting unsuccesful!")
@@ -540,6 +881,44 @@ class Model:
             tau_sum = self.tau_fit
         return tau_sum, fit_rep
 
+    def findTau_fitMultistart(self, preparams, opt_method, max_workers=None):
+        """
+        Runs findTau_fit for several sets of starting parameters in parallel
+        processes and keeps the fit with the lowest ChiSquare, to avoid
+        ending up in a local minimum.
+
+        Parameters
+        ----------
+        preparams : list
+            A list of starting parameters, each in the format of preparam
+            for findTau_fit.
+        opt_method: string
+            The algorithm used by the optimization function.
+        max_workers : int, optional
+            The maximum number of worker processes. The default is None,
+            which uses the number of processors.
+
+        Returns
+        -------
+        tau_sum : list
+            The fitted parameters of the best start, as returned by
+            findTau_fit.
+        fit_reps : list
+            The fit reports of all starts in the order of preparams.
+
+        """
+        n = len(preparams)
+        # on Linux the workers are forked, which is only safe while no other
+        # threads are writing
+        stopSavePool()
+        with ProcessPoolExecutor(max_workers=max_workers) as ex:
+            results = list(ex.map(fitStart, [self]*n, preparams,
+                                  [opt_method]*n))
+        tau_sum, fit_rep, self.tau_fit, self.chisqr = min(
+            results, key=lambda result: result[3])
+        fit_reps = [result[1] for result in results]
+        return tau_sum, fit_reps
+
     def calcD_fit(self):
         """
         Calculates D_fit from the previously calculated self.tau_fit and x_fix,
@@ -552,9 +931,7 @@ class Model:
 
         """
         self.M_fit = self.getM(self.tau_fit)
-        res1 = self.spectra @ self.M_fit.T
-        bra1 = np.linalg.inv(self.M_fit @ self.M_fit.T)
-        D_fit = res1 @ bra1
+        D_fit = self.solveD(self.M_fit)
         self.D_fit = D_fit
         return D_fit
 
@@ -609,8 +986,7 @@ class Model:
             The minimal value for the colorbar.
 
         """
-        flat_A = data.flatten()
-        v_min = min(flat_A) * mul
+        v_min = data.min() * mul
         return v_min
 
     def setv_max(self, data, mul):
@@ -631,11 +1007,46 @@ class Model:
             The maximal value for the colorbar.
 
         """
-        flat_A = data.flatten()
-        v_max = max(flat_A) * mul
+        v_max = data.max() * mul
         return v_max
 
-    def findNearestIndex(self, x, data):
+    def setv_range(self, data, mul, v_min=None, v_max=None):
+        """
+        Fills in the missing limits for the colorbar like setv_min and
+        setv_max. Both extrema come from the same call and are kept for the
+        last data, so plotting the same data again does not scan it again.
+
+        Parameters
+        ----------
+        data : np.array
+            An array containing data.
+        mul : float
+            The value by which data will be multiplied.
+        v_min : float, optional
+            The given lower limit, None if it should be determined.
+            The default is None.
+        v_max : float, optional
+            The given upper limit, None if it should be determined.
+            The default is None.
+
+        Returns
+        -------
+        v_min : float
+            The minimal value for the colorbar.
+        v_max : float
+            The maximal value for the colorbar.
+
+        """
+        if v_min is None or v_max is None:
+            if self.range_cache is None or self.range_cache[0] is not data:
+                self.range_cache = (data, data.min(), data.max())
+            if v_min is None:
+                v_min = self.range_cache[1] * mul
+            if v_max is None:
+                v_max = self.range_cache[2] * mul
+        return v_min, v_max
+
+    def findNearestIndex(self, x, data, order=None):
         """
         Finds the nearest indices for the elements in x in the data.
 
@@ -645,6 +1056,9 @@ class Model:
             A list of values which are within the borders of the data.
         data : np.array
             An array containing data.
+        order : np.array, optional
+            The stable argsort of the data, if it is already known.
+            The default is None.
 
 
         Returns
@@ -653,12 +1067,97 @@ class Model:
             The nearest indices for the given values.
 
         """
-        x = list(x)
-        for i in range(len(x)):
-            mini = np.argmin(abs(data - x[i]))
-            x[i] = mini
-        return x
+        x = np.asarray(x, dtype=np.float64)
+        if order is None:
+            order = np.argsort(data, kind="stable")
+        sorted_data = data[order]
+        idx = np.searchsorted(sorted_data, x)
+        idx = np.clip(idx, 1, len(sorted_data)-1)
+        # first occurrences of the neighbouring values, ties go to the lower
+        # index like np.argmin
+        left = order[np.searchsorted(sorted_data, sorted_data[idx-1])]
+        right = order[np.searchsorted(sorted_data, sorted_data[idx])]
+        d_left = np.abs(x - data[left])
+        d_right = np.abs(x - data[right])
+        nearest = np.where((d_left < d_right) |
+                           ((d_left == d_right) & (left < right)), left, right)
+        return nearest.tolist()
     
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def mulLabel(mul):
+        """
+        Creates the addition to the axis label for data multiplied by mul.
+
+        Parameters
+        ----------
+        mul : float
+            The value by which data will be multiplied.
+
+        Returns
+        -------
+        dot : string
+            The addition to the axis label, empty if mul is 1.
+
+        """
+        if mul == 1:
+            return ""
+        # the Script and Controller API don't clamp mul like the GUI does
+        if not (mul > 0 and np.isfinite(mul)):
+            return rf" $\cdot {mul:g}$"
+        ltx = np.log10(mul)
+        if ltx == round(ltx):
+            return rf" $\cdot 10^{{{round(ltx)}}}$"
+        return rf" $\cdot {mul:g}$"
+
+    @staticmethod
+    def isRegular(values):
+        """
+        Checks if the values are ascending with a constant step, so they can
+        be shown as an image instead of a mesh.
+
+        Parameters
+        ----------
+        values : np.array
+            The lambdas or delays.
+
+        Returns
+        -------
+        bool
+            True if the values are evenly spaced.
+
+        """
+        if len(values) < 2:
+            return False
+        steps = np.diff(values)
+        return bool(steps[0] > 0 and np.allclose(steps, steps[0], rtol=1e-6,
+                                                  atol=0))
+
+    def getIndices(self, x, axis):
+        """
+        Returns the nearest indices for the elements in x in the lambdas or
+        delays. The results are cached, since the different plots ask for
+        the same wavelengths and delays again and again.
+
+        Parameters
+        ----------
+        x : list
+            A list of values which are within the borders of the data.
+        axis : string
+            Either "lambdas" or "delays".
+
+        Returns
+        -------
+        indices : list
+            The nearest indices for the given values.
+
+        """
+        key = (axis, tuple(x))
+        if key not in self.index_cache:
+            self.index_cache[key] = self.findNearestIndex(
+                x, getattr(self, axis), self.sort_orders[axis])
+        return list(self.index_cache[key])
+
     def log_tick_formatter(self, val, pos=None):
         '''
         A logarithmic tick formatter for the 3D contour plot.
@@ -697,40 +1196,32 @@ class Model:
         None.
 
         """
-        ltx = str(mul).count("0")
         unit = ""
         if "/" in labels[0]:
             unit = labels[0].split("/")[1]
-        dot = ""
-        if mul != 1:
-            dot = f" $\cdot 10^{ltx}$"
+        dot = self.mulLabel(mul)
         
         ax1 = plt.subplot(grid[0, 0])
         ax1.set_yscale("log")
         ax1.set_xlabel(labels[2] + dot)
         ax1.set_ylabel(labels[1])
 
-        for i, ind in enumerate(wave_index):
-            ax1.plot(
-                spectra[ind],
-                self.delays,
-                label=str(wave[i]) + unit
-            )
+        temp = spectra[wave_index]
+        lines = ax1.plot(temp.T, self.delays)
         ax1.axvline(0, color="black",lw = 0.5 , alpha=0.75)
-        temp = np.concatenate([spectra[i]
-                              for i in wave_index])
         ax1.axis(
             [
-                1.05 * min(np.array(temp)),
-                1.05 * max(np.array(temp)),
-                min(self.delays),
-                max(self.delays),
+                1.05 * temp.min(),
+                1.05 * temp.max(),
+                self.t_min,
+                self.t_max,
             ]
         )
         ax1.set_xticks(())
         ax1.tick_params(bottom=False)
-        ax1.legend(loc="upper left", frameon=False, labelcolor="linecolor",
-                   handlelength=0,fontsize=11)
+        ax1.legend(lines, [str(w) + unit for w in wave], loc="upper left",
+                   frameon=False, labelcolor="linecolor", handlelength=0,
+                   fontsize=11)
 
     def plot2(self, grid, wave, time, v_min, v_max, spectra, add, cont, mul, labels):
         """
@@ -755,7 +1246,7 @@ class Model:
             Addition to the title of the subplot.
         cont : float
             Determines how much contour lines will be shown in the 2D plot.
-            High values will show more lines.
+            High values will show more lines, up to MAX_CONTOURS.
 
         Returns
         -------
@@ -768,6 +1259,8 @@ class Model:
         ax2 = plt.subplot(grid[0, 1])
         ax2.set_yscale("log")
         ax2.set_xlabel(labels[0])
+        # the spectra passed by plotCustom are already multiplied
+        v_min, v_max = self.setv_range(spectra, 1, v_min, v_max)
         A_t = spectra.T
         pcm = ax2.pcolormesh(
             self.lambdas,
@@ -776,18 +1269,15 @@ class Model:
             cmap=plt.cm.seismic,
             norm=col.TwoSlopeNorm(vcenter=0, vmin=v_min, vmax=v_max),
             shading="auto",
+            rasterized=True,
         )
-        if v_min is None:
-            v_min = self.setv_min(spectra, mul)
-        if v_max is None:
-            v_max = self.setv_max(spectra, mul)
         cb = plt.colorbar(pcm)
         cb.set_ticks([v_min, 0, v_max])
         contours = ax2.contour(
             self.lambdas,
             self.delays,
             A_t,
-            levels=np.arange(v_min, v_max, (1 / cont) * (v_max - v_min)),
+            levels=self.getLevels(v_min, v_max, cont),
             colors="black",
             linewidths=0.7,
             linestyles="solid",
@@ -802,16 +1292,40 @@ class Model:
 
         ax2.axis(
             [
-                min(self.lambdas),
-                max(self.lambdas),
-                [min(self.delays) if min(self.delays) > 0 else 10 ** (-2)][0],
-                max(self.delays),
+                self.l_min,
+                self.l_max,
+                [self.t_min if self.t_min > 0 else 10 ** (-2)][0],
+                self.t_max,
             ]
         )
         ax2.set_yticks(())
         
         return ax2, cb
 
+    @staticmethod
+    def getLevels(v_min, v_max, cont):
+        """
+        Returns the evenly spaced contour levels of the 2D plots.
+
+        Parameters
+        ----------
+        v_min : float
+            Lower limit for the colorbar.
+        v_max : float
+            Upper limit for the colorbar.
+        cont : float
+            Determines how much contour lines will be shown in the 2D plot.
+            High values will show more lines, up to MAX_CONTOURS.
+
+        Returns
+        -------
+        levels : np.array
+            The levels from v_min on, one step below v_max.
+
+        """
+        n = max(int(min(cont, MAX_CONTOURS)), 1)
+        return np.linspace(v_min, v_max, n, endpoint=False)
+
     def plot3(self, grid, time, time_index, spectra, mul, labels):
         """
         Plots a subplot of absorption change against wavelenghts for chosen
@@ -833,37 +1347,83 @@ class Model:
         None.
 
         """
-        ltx = str(mul).count("0")
         unit = ""
         if "/" in labels[1]:
             unit = labels[1].split("/")[1]
-        dot = ""
-        if mul != 1:
-            dot = f" $\cdot 10^{ltx}$"
+        dot = self.mulLabel(mul)
         ax3 = plt.subplot(grid[0, 2])
         ax3.set_ylabel(labels[2] + dot)
         ax3.set_xlabel(labels[0])
-        y = np.zeros(len(self.lambdas))
-        hoehe = 0
-        temp = np.zeros(len(self.lambdas))
-        for i, ind in enumerate(time_index):
-            for j in range(len(self.lambdas)):
-                temp[j] = spectra[j][ind]
-                y[j] = temp[j] + hoehe
-            if ind == time_index[0]:
-                mini = min(y)
-            ax3.plot(self.lambdas, y, color="black")
-            ax3.annotate(
-                str(time[i]) + unit, (0.5 * (min(self.lambdas) +
-                                 max(self.lambdas)), hoehe)
-            )
-            ax3.axhline(hoehe, color="black", lw = 0.5, alpha = 0.75)
-            hoehe += 1.1 * (abs(max(temp)) + abs(min(temp)))
-        ax3.axis([min(self.lambdas), max(self.lambdas), 1.1 * mini,
-                  1.1 * max(y)])
+        temp = spectra[:, time_index]
+        # every slice is stacked on top of the previous ones
+        steps = 1.1 * (np.abs(temp.max(axis=0)) + np.abs(temp.min(axis=0)))
+        hoehe = np.concatenate(([0], np.cumsum(steps)[:-1]))
+        y = temp + hoehe
+        for i in range(len(time_index)):
+            ax3.plot(self.lambdas, y[:, i], color="black")
+            ax3.annotate(str(time[i]) + unit,
+                         (0.5 * (self.l_min + self.l_max), hoehe[i]))
+            ax3.axhline(hoehe[i], color="black", lw = 0.5, alpha = 0.75)
+        ax3.axis([self.l_min, self.l_max, 1.1 * y[:, 0].min(),
+                  1.1 * y[:, -1].max()])
         ax3.set_yticks(())
         
-    def plot3D(self, spectra,v_min, v_max, mul, labels, add=""):
+    def getScaled(self, spectra, mul, transpose=False):
+        """
+        Returns the spectra multiplied by mul for the plots. The result is
+        kept, so plotting the same spectra with the same mul again needs no
+        new pass over the data, and a new mul is written into the old buffer
+        instead of a new array. The buffer must not be changed by the caller.
+
+        Parameters
+        ----------
+        spectra : np.array
+            Contains the values of the spectra.
+        mul : float
+            The value by which the spectra will be multiplied.
+        transpose : bool, optional
+            If True the transposed spectra are returned as a C-contiguous
+            array with the delays along the rows. The default is False.
+
+        Returns
+        -------
+        scaled : np.array
+            The multiplied spectra.
+
+        """
+        if mul == 1 and not transpose:
+            return spectra
+        source = spectra.T if transpose else spectra
+        cached = self.scaled_cache.get(transpose)
+        if cached is not None and cached[0] is spectra:
+            if cached[1] == mul:
+                return cached[2]
+            buf = cached[2]
+        else:
+            buf = np.empty(source.shape)
+        np.multiply(source, mul, out=buf)
+        self.scaled_cache[transpose] = (spectra, mul, buf)
+        return buf
+
+    def getMesh(self):
+        """
+        Returns the grid of the lambdas and the logarithmic delays for the 3D
+        contour plot. It is only generated again if the shape of the data
+        changed.
+
+        Returns
+        -------
+        mesh : tuple
+            The grids X and Y of np.meshgrid.
+
+        """
+        shape = (len(self.delays), len(self.lambdas))
+        if self.mesh is None or self.mesh[0].shape != shape:
+            self.mesh = tuple(np.meshgrid(self.lambdas,
+                                          np.log10(abs(self.delays))))
+        return self.mesh
+
+    def plot3D(self, spectra,v_min, v_max, mul, labels, add="", cont=20):
         """
         Allows for the creation of a 3D contour plot. Just because I can.        
 
@@ -875,43 +1435,36 @@ class Model:
             Lower limit for the colorbar.
         v_max : float
             Upper limit for the colorbar.
-        cont : float
-            Determines how much contour lines will be shown in the 2D plot.
-            High values will show more lines.
         add : string, optional
             Addition to the title of the subplot. The default is "".
         mul : float
             The value by which the spectra will be multiplied.
             The default is 1.
+        cont : int, optional
+            The number of contour levels. The default is 20.
 
         Returns
         -------
         None.
 
         """
+        loadPlotting()
         fig, ax = plt.subplots(figsize=(11.2,8),subplot_kw={"projection" : "3d"})
-        log_delay = np.log10(abs(self.delays))
-        ltx = str(mul).count("0")
-        dot = ""
-        if mul != 1:
-            dot = f" $\cdot 10^{ltx}$"
-        if v_min is None:
-            v_min = self.setv_min(spectra, mul)
-        if v_max is None:
-            v_max = self.setv_max(spectra, mul)
-        X, Y = np.meshgrid(self.lambdas, log_delay)
-        Z = spectra.T*mul
+        dot = self.mulLabel(mul)
+        v_min, v_max = self.setv_range(spectra, mul, v_min, v_max)
+        X, Y = self.getMesh()
+        Z = self.getScaled(spectra, mul, transpose=True)
         ax = plt.axes(projection='3d')
-        ax.contour3D(X,Y,Z,80,cmap='seismic')
+        ax.contour3D(X,Y,Z,cont,cmap='seismic')
         ax.set_xlabel(labels[0])
         ax.set_ylabel(labels[1])
         ax.set_zlabel(labels[0] + dot)
         ax.yaxis.set_major_formatter(mticker.FuncFormatter(self.log_tick_formatter))
-        yticks = np.linspace(min(log_delay), max(log_delay), 4)
+        yticks = np.linspace(Y[:, 0].min(), Y[:, 0].max(), 4)
         yticks[0] = -1
         ax.set_yticks(yticks)
         ax.view_init(20,250)
-        plt.savefig(self.path + self.name + "3DContour" + ".png")
+        self.saveFigure(fig, "3DContour")
         
     def plotCustom(self, spectra, wave, time, v_min, v_max, custom, cont, mul, labels,
                    add=""):
@@ -934,7 +1487,7 @@ class Model:
             Describes which subplots will be plotted.
         cont : float
             Determines how much contour lines will be shown in the 2D plot.
-            High values will show more lines.
+            High values will show more lines, up to MAX_CONTOURS.
         mul : float
             The value by which the spectra will be multiplied.
             The default is 1.
@@ -946,72 +1499,32 @@ class Model:
         None.
 
         """
-        ltx = str(mul).count("0")
-        dot = ""
-        if mul != 1:
-            dot = f" $\cdot 10^{ltx}$"
-        if v_min is None:
-            v_min = self.setv_min(spectra, mul)
-        if v_max is None:
-            v_max = self.setv_max(spectra, mul)
-        wave_index = self.findNearestIndex(wave, self.lambdas)
-        time_index = self.findNearestIndex(time, self.delays)
-        space = 0
-
-        if custom == "1":
-            width = 2.5
-            w1 = 1.0
-            w2 = 0
-            w3 = 0
-        elif custom == "2":
-            width = 5.2
-            w1 = 0
-            w2 = 4.7
-            w3 = 0
-        elif custom == "3":
-            width = 2
-            w1 = 0
-            w2 = 0
-            w3 = 1.5
-        elif custom == "1+2":
-            width = 7
-            w1 = 1.0
-            w2 = 3.7
-            w3 = 0
-        elif custom == "1+3":
-            width = 5
-            w1 = 1.0
-            w2 = 0
-            w3 = 1.5
-            space = 0.25
-        elif custom == "2+3":
-            width = 7
-            w1 = 0
-            w2 = 4.7
-            w3 = 1.5
-        elif custom == "1+2+3":
-            width = 9
-            w1 = 1.0
-            w2 = 3.7
-            w3 = 1.5
+        loadPlotting()
+        dot = self.mulLabel(mul)
+        v_min, v_max = self.setv_range(spectra, mul, v_min, v_max)
+        wave_index = self.getIndices(wave, "lambdas")
+        time_index = self.getIndices(time, "delays")
+        width, w1, w2, w3, space = CUSTOM_LAYOUTS[custom]
 
         fig = plt.figure(
             figsize=(width, 3), constrained_layout=False, frameon=True
         )
         grid = plt.GridSpec(1, 3, wspace=space, width_ratios=[w1, w2, w3])
+        # scaled once and shared by all subplots
+        scaled = self.getScaled(spectra, mul)
 
         if w1 != 0:
-            self.plot1(grid, wave, wave_index, spectra*mul, mul, labels)
+            self.plot1(grid, wave, wave_index, scaled, mul, labels)
         if w2 != 0:
             ax2, cb = self.plot2(grid, wave, time, v_min,
-                                 v_max, spectra*mul, add, cont, mul, labels)
+                                 v_max, scaled, add, cont, mul, labels)
             if w3 == 0:
                 cb.set_label(labels[2] + dot)
             if w2 == 4.7:
                 ax2.yaxis.set_major_locator(mticker.LogLocator())
                 ax2.set_ylabel(labels[1])
         if w3 != 0:
-            self.plot3(grid, time, time_index, spectra*mul, mul, labels)
+            self.plot3(grid, time, time_index, scaled, mul, labels)
         grid.tight_layout(fig)
         plt.savefig(self.path + self.name + add  + ".png",
             bbox_inches="tight")
@@ -1036,7 +1549,7 @@ class Model:
             Describes which subplots will be plotted.
         cont : float
             Determines how much contour lines will be shown in the 2D plot.
-            High values will show more lines.
+            High values will show more lines, up to MAX_CONTOURS.
         mul : float
             The value by which the spectra will be multiplied.
             The default is 1.
@@ -1055,6 +1568,94 @@ class Model:
         if solo == "H":
             self.plotHeat(wave, time, v_min, v_max, spectra, cont, mul, labels, add)
             
+    def getFigure(self, kind, figsize=None):
+        """
+        Returns the figure for a kind of single plot with one fresh axis.
+        Every kind gets its own figure, so all selected plots stay open next
+        to each other. Plotting the same kind again clears and reuses its
+        figure instead of opening a new one, unless it was closed.
+
+        Parameters
+        ----------
+        kind : string
+            The name of the plot, as used for the saved file.
+        figsize : tuple, optional
+            Width and height of the figure in inches. The default is None,
+            which uses the size of the style sheet.
+
+        Returns
+        -------
+        fig : plt.figure
+            The figure of this kind of plot.
+        ax : plt.subplot
+            The axis of the plot.
+
+        """
+        fig = self.figures.get(kind)
+        if fig is None or not plt.fignum_exists(fig.number):
+            fig = plt.figure()
+            self.figures[kind] = fig
+        else:
+            fig.clf()
+        if figsize is None:
+            figsize = mpl.rcParams["figure.figsize"]
+        fig.set_size_inches(figsize)
+        return fig, fig.add_subplot()
+
+    def saveFigure(self, fig, add):
+        """
+        Saves a figure as png in the analysis folder. The figure is rendered
+        right away, so it can be cleared and reused afterwards, but the png
+        encoding and writing run in the background in SAVE_POOL, until
+        waitSaves is called.
+
+        Parameters
+        ----------
+        fig : plt.figure
+            The figure to be saved.
+        add : string
+            Addition to the name of the file.
+
+        Returns
+        -------
+        future : concurrent.futures.Future
+            The pending write of the file, None if it was written right away.
+
+        """
+        path = self.path + self.name + add + ".png"
+        dpi = mpl.rcParams["savefig.dpi"]
+        if dpi == "figure":
+            dpi = fig.dpi
+        if dpi != fig.dpi:
+            # the canvas only renders at the dpi of the figure itself
+            fig.savefig(path, format="png", dpi=dpi)
+            return None
+        # the renderer knows the exact size in pixels, which can be one more
+        # than the size in inches times the dpi
+        fig.canvas.draw()
+        rgba = np.asarray(fig.canvas.buffer_rgba()).copy()
+        future = getSavePool().submit(plt.imsave, path, rgba, format="png",
+                                      dpi=dpi)
+        self.saves.append(future)
+        return future
+
+    def waitSaves(self):
+        """
+        Waits until all figures passed to saveFigure are written and raises
+        the first error of their writes, e.g. if the analysis folder is not
+        writable.
+
+        Returns
+        -------
+        None.
+
+        """
+        saves, self.saves = self.saves, []
+        for future in saves:
+            future.exception()
+        for future in saves:
+            future.result()
+
     def plotData(self, x, y, x_label, y_label, label, add=""):
         """
         Allows for the plotting of any 2D data.
@@ -1079,7 +1680,8 @@ class Model:
         None.
 
         """
-        fig, ax = plt.subplots()
+        loadPlotting()
+        fig, ax = self.getFigure(add)
         temp = y.flatten()
         ax.axis(
             [
@@ -1100,8 +1702,7 @@ class Model:
         if label != None:
             ax.legend(label, frameon=False, labelcolor="linecolor",
                        handlelength=0, loc="lower right")
-        plt.savefig(self.path + self.name + add  + ".png",
-                    bbox_inches="tight")
+        self.saveFigure(fig, add)
         
         
     def plotWSlices(self, wave, spectra, mul, labels, add):
@@ -1123,43 +1724,112 @@ class Model:
         None.
 
         """
-        fig,ax = plt.subplots()
-        wave_index = self.findNearestIndex(wave, self.lambdas)
-        ltx = str(mul).count("0")
+        loadPlotting()
+        fig, ax = self.getFigure("Wavelength_Slices")
+        wave_index = self.getIndices(wave, "lambdas")
         unit = ""
         if "/" in labels[0]:
             unit = labels[0].split("/")[1]
-        dot = ""
-        if mul != 1:
-            dot = f" $\cdot 10^{ltx}$"
+        dot = self.mulLabel(mul)
         
         ax.set_xscale("log")
         ax.set_ylabel(labels[2] + dot)
         ax.set_xlabel(labels[1])
 
-        for i in wave_index:
-            plt.plot(
-                self.delays,
-                spectra[i],
-                label=str(self.lambdas[i]) + " " + unit
-            )
-        temp = np.concatenate([spectra[i]
-                              for i in wave_index])
+        temp = spectra[wave_index]
+        lines = ax.plot(self.delays, temp.T)
         ax.axis(
             [
-                min(self.delays),
-                max(self.delays),
-                1.05 * min(temp),
-                1.05 * max(temp)
+                self.t_min,
+                self.t_max,
+                1.05 * temp.min(),
+                1.05 * temp.max()
             ]
         )
         ax.axhline(0, color="black", lw=0.5, alpha = 0.75)
         ax.set_yticks(())
         ax.tick_params(bottom=False)
-        ax.legend(loc="upper right", frameon=False, labelcolor="linecolor",
-                   handlelength=0)
-        plt.savefig(self.path + self.name + "Wavelength_Slices" + ".png")
+        ax.legend(lines, [str(self.lambdas[i]) + " " + unit
+                          for i in wave_index],
+                  loc="upper right", frameon=False, labelcolor="linecolor",
+                  handlelength=0)
+        self.saveFigure(fig, "Wavelength_Slices")
         
+    def getHeatmap(self, kind, A_t, norm):
+        """
+        Returns the heatmap of plotHeat with its colorbar. If the figure of
+        this kind is still open from the last call, only the values and the
+        norm of its mesh are replaced and the contour lines and slice
+        markers are removed, instead of building a new figure, mesh and
+        colorbar.
+
+        Parameters
+        ----------
+        kind : string
+            The name of the plot, as used for the saved file.
+        A_t : np.array
+            The transposed spectra to be shown.
+        norm : col.TwoSlopeNorm
+            The norm of the colormap.
+
+        Returns
+        -------
+        fig : plt.figure
+            The figure of the heatmap.
+        ax : plt.subplot
+            The axis of the heatmap.
+        pcm : QuadMesh or AxesImage
+            The mesh or image of the values.
+        cb : plt.colorbar
+            The object colorbar.
+
+        """
+        heatmap = self.heatmaps.get(kind)
+        if heatmap is not None:
+            pcm, cb, artists = heatmap
+            fig = pcm.figure
+            if (fig is self.figures.get(kind) and
+                    plt.fignum_exists(fig.number) and
+                    pcm.get_array().shape == A_t.shape):
+                for artist in artists:
+                    artist.remove()
+                if self.regular_grid:
+                    pcm.set_data(A_t)
+                else:
+                    pcm.set_array(A_t)
+                pcm.set_norm(norm)
+                cb.update_normal(pcm)
+                return fig, pcm.axes, pcm, cb
+        fig, ax = self.getFigure(kind, figsize=(7.6, 4))
+        if self.regular_grid:
+            # one image instead of a quad per data point, the log scale is
+            # only set afterwards so the extent below zero is no problem
+            dl = 0.5 * (self.lambdas[1] - self.lambdas[0])
+            dd = 0.5 * (self.delays[1] - self.delays[0])
+            pcm = ax.imshow(
+                A_t,
+                cmap=plt.cm.seismic,
+                norm=norm,
+                aspect="auto",
+                origin="lower",
+                interpolation="nearest",
+                extent=[self.lambdas[0] - dl, self.lambdas[-1] + dl,
+                        self.delays[0] - dd, self.delays[-1] + dd],
+            )
+        else:
+            pcm = ax.pcolormesh(
+                self.lambdas,
+                self.delays,
+                A_t,
+                cmap=plt.cm.seismic,
+                norm=norm,
+                shading="auto",
+                rasterized=True,
+            )
+        ax.set_yscale("log")
+        cb = fig.colorbar(pcm, ax=ax)
+        return fig, ax, pcm, cb
+
     def plotHeat(self, wave, time, v_min, v_max, spectra, cont, mul, labels, add):
         """
         Plots a subplot with a heatmap of the absorption change in delays
@@ -1179,7 +1849,7 @@ class Model:
             Contains the values of the spectra.
         cont : float
             Determines how much contour lines will be shown in the 2D plot.
-            High values will show more lines.
+            High values will show more lines, up to MAX_CONTOURS.
         mul : float
             The value by which the spectra will be multiplied.
             The default is 1.
@@ -1191,60 +1861,47 @@ class Model:
         None.
 
         """
-        fig, ax = plt.subplots(figsize = (7.6,4))
-        ltx = str(mul).count("0")
-        dot = ""
-        if mul != 1:
-            dot = f" $\cdot 10^{ltx}$"
-        ax.set_yscale("log")
+        loadPlotting()
+        kind = "Residuals" if "Residuals" in add else "Heatmap"
+        dot = self.mulLabel(mul)
+        # pcolormesh and contour both walk the delays row by row
+        A_t = self.getScaled(spectra, mul, transpose=True)
+        v_min, v_max = self.setv_range(spectra, mul, v_min, v_max)
+        norm = col.TwoSlopeNorm(vcenter=0, vmin=v_min, vmax=v_max)
+        fig, ax, pcm, cb = self.getHeatmap(kind, A_t, norm)
         ax.set_xlabel(labels[0])
         ax.set_ylabel(labels[1])
-        A_t = spectra.T*mul
-        pcm = ax.pcolormesh(
-            self.lambdas,
-            self.delays,
-            A_t,
-            cmap=plt.cm.seismic,
-            norm=col.TwoSlopeNorm(vcenter=0, vmin=v_min, vmax=v_max),
-            shading="auto",
-        )
-        if v_min is None:
-            v_min = self.setv_min(spectra, mul)
-        if v_max is None:
-            v_max = self.setv_max(spectra, mul)
-        cb = plt.colorbar(pcm)
         cb.set_ticks([v_min, 0, v_max])
         cb.set_label(labels[2] + dot)
         contours = ax.contour(
             self.lambdas,
             self.delays,
             A_t,
-            levels=np.arange(v_min, v_max, (1 / cont) * (v_max - v_min)),
+            levels=self.getLevels(v_min, v_max, cont),
             colors="black",
             linewidths=0.7,
             linestyles="solid",
         )
         ax.clabel(contours, inline=False, fontsize=0)
+        artists = [contours]
 
         for i in wave:
-            ax.axvline(i,color="black", linestyle="-.")
+            artists.append(ax.axvline(i,color="black", linestyle="-."))
 
         for i in time:
-            ax.axhline(i, color="black", linestyle="dotted")
+            artists.append(ax.axhline(i, color="black", linestyle="dotted"))
 
         ax.axis(
             [
-                min(self.lambdas),
-                max(self.lambdas),
-                [min(self.delays) if min(self.delays) > 0 else 10 ** (-2)][0],
-                max(self.delays),
+                self.l_min,
+                self.l_max,
+                [self.t_min if self.t_min > 0 else 10 ** (-2)][0],
+                self.t_max,
             ]
         )
         ax.set_xticks
-        if "Residuals" in add:
-            plt.savefig(self.path + self.name + "Residuals" + ".png")
-        else:
-            plt.savefig(self.path + self.name + "Heatmap" + ".png")
+        self.heatmaps[kind] = (pcm, cb, artists)
+        self.saveFigure(fig, kind)
         
     def plotDSlices(self, time, spectra, mul, labels, add):
         """
@@ -1265,32 +1922,30 @@ class Model:
         None.
 
         """
-        fig, ax = plt.subplots()
-        time_index = self.findNearestIndex(time, self.delays)
-        ltx = str(mul).count("0")
+        loadPlotting()
+        fig, ax = self.getFigure("Delay_Slices")
+        time_index = self.getIndices(time, "delays")
         unit = ""
         if "/" in labels[1]:
             unit = labels[1].split("/")[1]
-        dot = ""
-        if mul != 1:
-            dot = f" $\cdot 10^{ltx}$"
+        dot = self.mulLabel(mul)
         ax.set_ylabel(labels[2] + dot)
         ax.set_xlabel(labels[0])
-        for i in time_index:
-            plt.plot(self.lambdas,spectra.T[i], label=str(self.delays[i]) + " " + unit)
+        temp = spectra[:, time_index]
+        lines = ax.plot(self.lambdas, temp)
         ax.tick_params(bottom=False)
-        ax.legend(loc="upper left", frameon=False, labelcolor="linecolor",
-                   handlelength=0)
-        temp = np.concatenate([spectra.T[i]
-                              for i in time_index])
+        ax.legend(lines, [str(self.delays[i]) + " " + unit
+                          for i in time_index],
+                  loc="upper left", frameon=False, labelcolor="linecolor",
+                  handlelength=0)
         ax.axis(
             [
-                min(self.lambdas),
-                max(self.lambdas),
-                1.05 * min(temp),
-                1.05 * max(temp)
+                self.l_min,
+                self.l_max,
+                1.05 * temp.min(),
+                1.05 * temp.max()
             ]
         )
         ax.set_yticks(())
         ax.axhline(0, color="black", lw=0.5, alpha = 0.75)
-        plt.savefig(self.path + self.name + "Delay_Slices" + ".png")
\ No newline at end of file
+        self.saveFigure(fig, "Delay_Slices")
\ No newline at end of file
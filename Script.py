@@ -192,6 +192,9 @@ if orig ==4:
     Controller.plot3DOrigData(v_min, v_max, d_bounds, w_bounds, 
                              mul, opt_method, ivp_method)
 
+# The plots are written in the background, wait for them to be saved
+Controller.waitSaves()
+
 """Custom plots"""
 # If you want to create custom plots you can write the code here below.
 # Keep in mind that you still have to choose the right values for model,
@@ -2,6 +2,7 @@ import pytest as pt
 from Model import Model
 import numpy as np
 from models import Models
+from lmfit import Parameters
 
 class TestClassModel:
 
@@ -10,6 +11,20 @@ class TestClassModel:
     lambdas_filename = "/home/hackerman/Documents/fsTA Daten/c_PDI_c/01_Toluenez20_c_PDI_c_530_tol_lambda.txt"
     d_limits = [0.3, None]
     l_limits = [None, None]
+    opt_method = "Nelder-Mead"
+    ivp_method = "BDF"
+
+    def makeModel(self, model=0):
+        return Model(
+            self.delays_filename,
+            self.spectra_filename,
+            self.lambdas_filename,
+            self.d_limits,
+            self.l_limits,
+            model,
+            self.opt_method,
+            self.ivp_method
+        )
 
 
 class Test_init(TestClassModel):
@@ -144,6 +159,39 @@ class Test_calcdCdt(TestClassModel):
         assert self.dCdt == pt.approx(np.array([-0.83, 0.83, 0]))
 
 
+class Test_propagate(TestClassModel):
+    def setup(self):
+        model = 1
+        self.mod = Model(
+            self.delays_filename,
+            self.spectra_filename,
+            self.lambdas_filename,
+            self.d_limits,
+            self.l_limits,
+            model,
+            self.opt_method,
+            self.ivp_method
+        )
+        K = np.array([[-8.3e-01,  0.0e+00,  0.0e+00],
+                      [8.3e-01, -2.5e-02,  0.0e+00],
+                      [0.0e+00,  2.5e-02, -1.1e-06]])
+        self.mod.C_0 = np.array([1, 0, 0])
+        self.C_t = self.mod.propagate(K, np.array([0, 1, 10]))
+        K_defective = np.array([[-1.0, 0.0], [1.0, -1.0]])
+        self.mod.C_0 = np.array([1, 0])
+        self.C_defective = self.mod.propagate(K_defective, np.array([0, 1]))
+
+    def test_shape(self):
+        assert self.C_t.shape == (3, 3)
+
+    def test_values(self):
+        assert self.C_t[:, 0] == pt.approx([1, 0, 0])
+        assert self.C_t[0, 1:] == pt.approx(np.exp([-0.83, -8.3]))
+
+    def test_defective(self):
+        assert self.C_defective is None
+
+
 class Test_solveDiff(TestClassModel):
     def setup(self):
         model = 1
@@ -171,8 +219,9 @@ class Test_solveDiff(TestClassModel):
         assert type(self.C_t) == np.ndarray
         
     def test_values(self):
-        assert self.C_t[1,40:43] == pt.approx(np.array([0.87884498, 0.86658069,
-                                                        0.85193718]))
+        t = self.mod.delays - min(self.mod.delays)
+        C_B = 0.83 / (0.025 - 0.83) * (np.exp(-0.83 * t) - np.exp(-0.025 * t))
+        assert self.C_t[1] == pt.approx(C_B)
         
 class Test_getK(TestClassModel):
     def setup(self):
@@ -364,6 +413,80 @@ class Test_getDifference(TestClassModel):
     def test_values(self):
         assert self.Chi == 1.4805668823781104
         
+class Test_getJacobian(TestClassModel):
+    def setup(self):
+        model = 0
+        self.mod = Model(
+            self.delays_filename,
+            self.spectra_filename,
+            self.lambdas_filename,
+            self.d_limits,
+            self.l_limits,
+            model,
+            self.opt_method,
+            self.ivp_method
+        )
+        self.params = Parameters()
+        self.params.add("tau0", 1.2, min=0.01)
+        self.params.add("tau1", 150, min=0.01)
+        self.params.add("tau2", 900000, vary=False)
+        self.jac = self.mod.getJacobian(self.params)
+
+    def test_shape(self):
+        assert self.jac.shape == (self.mod.spectra.size, 2)
+
+    def test_values(self):
+        diff = self.mod.getDifference(self.params).ravel().copy()
+        params = self.params.copy()
+        params["tau1"].value += 1e-4
+        num = (self.mod.getDifference(params).ravel() - diff) / 1e-4
+        assert self.jac[:, 1] == pt.approx(num, rel=1e-3, abs=1e-9)
+
+    def test_gradient(self):
+        diff = self.mod.getDifference(self.params).ravel().copy()
+        grad = self.mod.getGradient(self.params)
+        assert grad == pt.approx(2 * diff @ self.jac, rel=1e-6)
+        
+class Test_findTau_fitMultistart(TestClassModel):
+    def setup(self):
+        model = 0
+        self.mod = Model(
+            self.delays_filename,
+            self.spectra_filename,
+            self.lambdas_filename,
+            self.d_limits,
+            self.l_limits,
+            model,
+            self.opt_method,
+            self.ivp_method
+        )
+        # open figures and pending saves must not be sent to the workers
+        self.mod.plotData(self.mod.delays, self.mod.spectra.T, "delay",
+                          "absorption change", None, add="_multistart")
+        preparams = [[(1.2, True), (106, True), (900000, False)],
+                     [(0.5, True), (20, True), (900000, False)]]
+        self.tau_sum, self.fit_reps = self.mod.findTau_fitMultistart(
+            preparams, "leastsq", max_workers=2)
+        self.best = self.mod.chisqr
+        self.chisqr = []
+        for preparam in preparams:
+            self.mod.findTau_fit(preparam, "leastsq")
+            self.chisqr.append(self.mod.chisqr)
+
+    def test_shape(self):
+        assert [len(self.tau_sum), len(self.fit_reps)] == [3, 2]
+
+    def test_type(self):
+        assert type(self.fit_reps[0]) == str
+
+    def test_best(self):
+        assert self.tau_sum[2] == 900000
+        assert self.best == pt.approx(min(self.chisqr), rel=1e-6)
+
+    def test_plot(self):
+        assert len(self.mod.figures) == 1
+        self.mod.waitSaves()
+
 class Test_findx_fit(TestClassModel):
     def setup(self):
         model = 0
@@ -522,8 +645,8 @@ class Test_setv_max(TestClassModel):
         
     def test_values(self):
         assert self.v_max == 1.0
-        
-class Test_FindNearestIndex(TestClassModel):
+
+class Test_setv_range(TestClassModel):
     def setup(self):
         model = 0
         self.mod = Model(
@@ -533,16 +656,99 @@ class Test_FindNearestIndex(TestClassModel):
             self.d_limits,
             self.l_limits,
             model,
+            self.opt_method,
+            self.ivp_method
         )
-        data = np.array([1.0 ,0.0002, 0.0, 0.61900])
-        x = [0.00019]
-        self.index = self.mod.findNearestIndex(x, data)
+        self.data = np.array([[1.0,-0.0002],[0.0,0.61900]])
+        self.v_range = self.mod.setv_range(self.data, 10)
+
+    def test_values(self):
+        assert self.v_range == (-0.002, 10.0)
+
+    def test_given(self):
+        assert self.mod.setv_range(self.data, 10, v_max=3.0) == (-0.002, 3.0)
+        
+class Test_FindNearestIndex(TestClassModel):
+    def setup(self):
+        self.mod = self.makeModel()
+        self.data = np.array([1.0 ,0.0002, 0.0, 0.61900])
+        self.x = [0.00019]
+        self.index = self.mod.findNearestIndex(self.x, self.data)
         
     def test_type(self):
         assert type(self.index) == list
         
     def test_values(self):
         assert self.index == [1]
+
+    def test_order(self):
+        order = np.argsort(self.data, kind="stable")
+        assert self.mod.findNearestIndex(self.x, self.data, order) == [1]
+
+class Test_getIndices(TestClassModel):
+    def setup(self):
+        self.mod = self.makeModel()
+        self.wave = [400, 500]
+        self.index = self.mod.getIndices(self.wave, "lambdas")
+
+    def test_values(self):
+        assert self.index == self.mod.findNearestIndex(self.wave,
+                                                       self.mod.lambdas)
+
+    def test_cache(self):
+        self.index.append(0)
+        assert self.mod.getIndices(self.wave, "lambdas") == self.index[:-1]
+
+class Test_isRegular(TestClassModel):
+    def test_values(self):
+        checks = [Model.isRegular(np.linspace(350, 750, 120)),
+                  Model.isRegular(np.array([0.1, 1, 10, 100])),
+                  Model.isRegular(np.array([3.0, 2.0, 1.0])),
+                  Model.isRegular(np.array([1.0]))]
+        assert checks == [True, False, False, False]
+
+class Test_getLevels(TestClassModel):
+    def setup(self):
+        self.levels = Model.getLevels(-3.2, 4.1, 7)
+
+    def test_values(self):
+        assert len(self.levels) == 7
+        assert self.levels[0] == -3.2
+        assert self.levels[-1] < 4.1
+
+    def test_cap(self):
+        assert len(Model.getLevels(-1, 1, 1000)) == 40
+        assert len(Model.getLevels(-1, 1, 0)) == 1
+
+class Test_getScaled(TestClassModel):
+    def setup(self):
+        self.mod = self.makeModel()
+        self.scaled = self.mod.getScaled(self.mod.spectra, 1000,
+                                         transpose=True)
+
+    def test_values(self):
+        assert np.allclose(self.scaled, self.mod.spectra.T * 1000)
+        assert self.scaled.flags["C_CONTIGUOUS"]
+
+    def test_cache(self):
+        again = self.mod.getScaled(self.mod.spectra, 1000, transpose=True)
+        assert again is self.scaled
+        other = self.mod.getScaled(self.mod.spectra, 10, transpose=True)
+        assert other is self.scaled
+        assert np.allclose(other, self.mod.spectra.T * 10)
+
+class Test_mulLabel(TestClassModel):
+    def test_one(self):
+        assert Model.mulLabel(1) == ""
+
+    def test_values(self):
+        labels = [Model.mulLabel(mul) for mul in [100, 1000.0, 0.001]]
+        assert labels == [r" $\cdot 10^{2}$", r" $\cdot 10^{3}$",
+                          r" $\cdot 10^{-3}$"]
+
+    def test_not_positive(self):
+        labels = [Model.mulLabel(mul) for mul in [0, -100, -2.5]]
+        assert labels == [r" $\cdot 0$", r" $\cdot -100$", r" $\cdot -2.5$"]
         
 # class Test_plot1(TestClassModel):
 #     def setup(self):